@@ -9,9 +9,9 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 celery = Celery(
     "app",
     broker=REDIS_URL,
-    backend=REDIS_URL,
+    backend=None,            # progress and completion are published to the task hash in Redis
     include=["app.tasks"],   # <-- force Celery to load tasks
 )
 
-celery.conf.task_track_started = True
+celery.conf.task_ignore_result = True
 celery.conf.worker_max_tasks_per_child = 100
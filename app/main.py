@@ -1,14 +1,19 @@
-import json
+import asyncio
+import hashlib
 import math
 import os
 import tempfile
 import uuid
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
-from typing import Dict, Optional
-from urllib import error as urllib_error
-from urllib import request as urllib_request
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
+import aiofiles
+import httpx
+import orjson
 from fastapi import (
+    Depends,
     FastAPI,
     File,
     Form,
@@ -17,23 +22,42 @@ from fastapi import (
     Request,
     UploadFile,
 )
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import func, select
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .database import Base, SessionLocal, engine
+from .database import Base, async_engine, engine, get_db
 from .models import Product, Webhook
-from .tasks import import_products_task, redis_client
+from .tasks import PRODUCTS_VERSION_KEY, get_task_state, import_products_task
 
-# create tables automatically for dev (use migrations in prod)
-Base.metadata.create_all(bind=engine)
+# create tables automatically for dev only (use migrations in prod); opt in with AUTO_CREATE_TABLES=1
+if os.getenv("AUTO_CREATE_TABLES", "").lower() in {"true", "1", "yes"}:
+    Base.metadata.create_all(bind=engine)
 
 app = FastAPI()
 templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "templates"))
 app.mount("/static", StaticFiles(directory=os.path.join(os.path.dirname(__file__), "static")), name="static")
 
 MAX_PER_PAGE = 200
+FRAGMENT_CACHE_TTL = int(os.getenv("FRAGMENT_CACHE_TTL", "30"))
+COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "300"))
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+# shared client so webhook calls reuse connections instead of blocking a worker thread
+http_client = httpx.AsyncClient(timeout=5, limits=httpx.Limits(max_connections=100))
+# rendered product fragments, keyed by the products version and the filters
+cache_client = aioredis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True)
+
+
+@app.on_event("shutdown")
+async def _shutdown() -> None:
+    await http_client.aclose()
+    await cache_client.close()
+    await async_engine.dispose()
 
 
 def _is_htmx(request: Request) -> bool:
@@ -86,7 +110,37 @@ def _parse_bool(value: Optional[str], default: bool = True) -> bool:
     return str(value).lower() in {"true", "1", "yes", "on"}
 
 
-def _fetch_products(session, filters: Dict):
+def _int_or_zero(value: Optional[str]) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+async def _count_products(session: AsyncSession, filters: Dict, conditions) -> int:
+    # cached per products version and filters, so cursor pages do not recount on every hit
+    count_filters = {key: value for key, value in filters.items() if key.startswith("filter_")}
+    digest = hashlib.sha1(orjson.dumps(count_filters, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    cache_key = None
+    try:
+        version = await cache_client.get(PRODUCTS_VERSION_KEY) or "0"
+        cache_key = f"pcount:{version}:{digest}"
+        cached = await cache_client.get(cache_key)
+        if cached is not None:
+            return int(cached)
+    except RedisError:
+        pass
+
+    total = await session.scalar(select(func.count(Product.id)).where(*conditions)) or 0
+    if cache_key:
+        try:
+            await cache_client.setex(cache_key, COUNT_CACHE_TTL, total)
+        except RedisError:
+            pass
+    return total
+
+
+async def _fetch_products(session: AsyncSession, filters: Dict, cursor: Optional[Tuple[datetime, int]] = None):
     offset = (filters["page"] - 1) * filters["per_page"]
     conditions = []
     if filters["filter_sku"]:
@@ -100,46 +154,88 @@ def _fetch_products(session, filters: Dict):
     elif filters["filter_active"] == "inactive":
         conditions.append(Product.active.is_(False))
 
-    base_stmt = select(Product)
-    if conditions:
-        base_stmt = base_stmt.where(*conditions)
-
-    count_stmt = select(func.count()).select_from(base_stmt.subquery())
-    total_count = session.scalar(count_stmt) or 0
+    def _page_stmt(page_offset: int, keyset: Optional[Tuple[datetime, int]] = None):
+        if keyset:
+            # seek past the previous page's last row instead of scanning and discarding an OFFSET;
+            # no window count here, since it would read every row after the cursor before LIMIT
+            stmt = select(Product).where(
+                *conditions, tuple_(Product.created_at, Product.id) < tuple_(*keyset)
+            )
+        else:
+            stmt = (
+                select(Product, func.count().over().label("total"))
+                .where(*conditions)
+                .offset(page_offset)
+            )
+        return stmt.order_by(Product.created_at.desc(), Product.id.desc()).limit(filters["per_page"])
+
+    rows = (await session.execute(_page_stmt(offset, cursor))).all()
+    if cursor:
+        total_count = await _count_products(session, filters, conditions)
+    else:
+        total_count = rows[0].total if rows else 0
+    if not rows and (offset or cursor):
+        # the requested page is past the end; fall back to the last page
+        total_count = await _count_products(session, filters, conditions)
+        if total_count:
+            filters["page"] = max(math.ceil(total_count / filters["per_page"]), 1)
+            offset = (filters["page"] - 1) * filters["per_page"]
+            rows = (await session.execute(_page_stmt(offset))).all()
+        else:
+            filters["page"] = 1
     pages = max(math.ceil(total_count / filters["per_page"]), 1) if total_count else 1
-    if filters["page"] > pages:
-        filters["page"] = pages
-        offset = (filters["page"] - 1) * filters["per_page"]
-
-    items_stmt = (
-        base_stmt.order_by(Product.created_at.desc())
-        .offset(offset)
-        .limit(filters["per_page"])
-    )
-    products = session.execute(items_stmt).scalars().all()
+    if rows:
+        # the count is a separate query and can race concurrent writes; never report fewer pages than shown
+        pages = max(pages, filters["page"])
+    products = [row[0] for row in rows]
+    next_cursor = None
+    if products and filters["page"] < pages and products[-1].created_at is not None:
+        next_cursor = (products[-1].created_at, products[-1].id)
     return {
         "products": products,
         "total": total_count,
         "pages": pages,
         "page": filters["page"],
+        "next_cursor": next_cursor,
     }
 
 
-def _render_products_fragment(request: Request, session, filters: Dict) -> HTMLResponse:
-    data = _fetch_products(session, filters)
+async def _render_products_fragment(
+    request: Request,
+    session: AsyncSession,
+    filters: Dict,
+    cursor: Optional[Tuple[datetime, int]] = None,
+) -> HTMLResponse:
+    data = await _fetch_products(session, filters, cursor)
     context = {
         "request": request,
         "products": data["products"],
         "page": data["page"],
         "pages": data["pages"],
         "total": data["total"],
+        "next_cursor": data["next_cursor"],
         "filters": filters,
     }
     return templates.TemplateResponse("products_fragment.html", context)
 
 
-def _render_webhooks_fragment(request: Request, session) -> HTMLResponse:
-    items = session.execute(select(Webhook).order_by(Webhook.created_at.desc())).scalars().all()
+async def _products_fragment_etag(filters: Dict, cursor: Optional[Tuple[datetime, int]] = None) -> str:
+    # hashlib rather than hash(): the key must agree across worker processes
+    version = await cache_client.get(PRODUCTS_VERSION_KEY) or "0"
+    digest = hashlib.sha1(orjson.dumps([filters, cursor], option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return f"{version}-{digest}"
+
+
+async def _bump_products_version() -> None:
+    # the write is already committed; a Redis outage must not turn it into a 500
+    try:
+        await cache_client.incr(PRODUCTS_VERSION_KEY)
+    except RedisError:
+        pass
+
+
+async def _render_webhooks_fragment(request: Request, session: AsyncSession) -> HTMLResponse:
+    items = (await session.execute(select(Webhook).order_by(Webhook.created_at.desc()))).scalars().all()
     return templates.TemplateResponse(
         "webhooks_fragment.html",
         {"request": request, "webhooks": items},
@@ -154,8 +250,10 @@ def index(request: Request):
 @app.post("/upload")
 async def upload(file: UploadFile = File(...)):
     temp_file = f"{tempfile.gettempdir()}/{uuid.uuid4()}.csv"
-    with open(temp_file, "wb") as f:
-        f.write(await file.read())
+    # copy in 1 MiB chunks so memory stays flat regardless of upload size
+    async with aiofiles.open(temp_file, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await f.write(chunk)
 
     task = import_products_task.delay(temp_file)
     return {"task_id": task.id}
@@ -163,18 +261,21 @@ async def upload(file: UploadFile = File(...)):
 
 @app.get("/task-status/{task_id}", response_class=JSONResponse)
 def task_status(task_id: str):
-    def _int_value(key: str) -> int:
-        try:
-            return int(redis_client.get(f"task:{task_id}:{key}") or 0)
-        except (TypeError, ValueError):
-            return 0
-
-    processed = _int_value("progress")
-    total = _int_value("total")
-    invalid = _int_value("invalid")
-    status = redis_client.get(f"task:{task_id}:status") or ""
-    error = redis_client.get(f"task:{task_id}:error")
-    percent = round((processed / total) * 100, 2) if total else None
+    values = get_task_state(
+        task_id, "progress", "total", "invalid", "bytes_read", "total_bytes", "status", "error"
+    )
+    processed = _int_or_zero(values["progress"])
+    total = _int_or_zero(values["total"])
+    invalid = _int_or_zero(values["invalid"])
+    bytes_read = _int_or_zero(values["bytes_read"])
+    total_bytes = _int_or_zero(values["total_bytes"])
+    status = values["status"] or ""
+    error = values["error"]
+    # the row total is only known once the import finishes, so estimate from bytes read
+    if total_bytes:
+        percent = round((bytes_read / total_bytes) * 100, 2)
+    else:
+        percent = round((processed / total) * 100, 2) if total else None
     return {
         "task_id": task_id,
         "processed": processed,
@@ -187,7 +288,7 @@ def task_status(task_id: str):
 
 
 @app.get("/products-fragment", response_class=HTMLResponse)
-def products_fragment(
+async def products_fragment(
     request: Request,
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=MAX_PER_PAGE),
@@ -195,20 +296,46 @@ def products_fragment(
     filter_name: str = "",
     filter_description: str = "",
     filter_active: str = "all",
+    after_created: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    session: AsyncSession = Depends(get_db),
 ):
     filters = _sanitize_filters(page, per_page, filter_sku, filter_name, filter_description, filter_active)
-    with SessionLocal() as session:
-        return _render_products_fragment(request, session, filters)
+    cursor = (after_created, after_id) if after_created is not None and after_id is not None else None
+    try:
+        tag = await _products_fragment_etag(filters, cursor)
+    except RedisError:
+        # the cache is best-effort: without Redis, render from Postgres with no ETag
+        return await _render_products_fragment(request, session, filters, cursor)
+    headers = {"ETag": f'"{tag}"', "Cache-Control": "no-cache"}
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+
+    cache_key = f"pfrag:{tag}"
+    try:
+        cached = await cache_client.get(cache_key)
+    except RedisError:
+        cached = None
+    if cached is not None:
+        return HTMLResponse(cached, headers=headers)
+
+    response = await _render_products_fragment(request, session, filters, cursor)
+    try:
+        await cache_client.setex(cache_key, FRAGMENT_CACHE_TTL, response.body.decode("utf-8"))
+    except RedisError:
+        pass
+    response.headers.update(headers)
+    return response
 
 
-def _product_action_response(request: Request, session, filters: Dict, payload: Dict):
+async def _product_action_response(request: Request, session: AsyncSession, filters: Dict, payload: Dict):
     if _is_htmx(request):
-        return _render_products_fragment(request, session, filters)
+        return await _render_products_fragment(request, session, filters)
     return JSONResponse(payload)
 
 
 @app.post("/product/create")
-def create_product(
+async def create_product(
     request: Request,
     sku: str = Form(...),
     name: Optional[str] = Form(None),
@@ -221,42 +348,43 @@ def create_product(
     filter_name: Optional[str] = Form(None),
     filter_description: Optional[str] = Form(None),
     filter_active: Optional[str] = Form(None),
+    session: AsyncSession = Depends(get_db),
 ):
     filters = _sanitize_filters(page, per_page, filter_sku, filter_name, filter_description, filter_active)
     sku_value = (sku or "").strip()
     if not sku_value:
         raise HTTPException(status_code=400, detail="SKU is required")
-    with SessionLocal() as session:
-        existing = session.execute(
-            select(Product).where(func.lower(Product.sku) == sku_value.lower())
-        ).scalars().first()
-        price_cents = _parse_price(price)
-        active_value = _parse_bool(active, True)
-        payload = {"result": "created"}
-        if existing:
-            existing.name = name.strip() if name else None
-            existing.description = description.strip() if description else None
-            existing.price_cents = price_cents
-            existing.active = active_value
-            session.add(existing)
-            payload = {"result": "updated", "id": existing.id}
-        else:
-            product = Product(
-                sku=sku_value,
-                name=name.strip() if name else None,
-                description=description.strip() if description else None,
-                price_cents=price_cents,
-                active=active_value,
-            )
-            session.add(product)
-            session.flush()
-            payload = {"result": "created", "id": product.id}
-        session.commit()
-        return _product_action_response(request, session, filters, payload)
+    existing = (
+        await session.execute(select(Product).where(func.lower(Product.sku) == sku_value.lower()))
+    ).scalars().first()
+    price_cents = _parse_price(price)
+    active_value = _parse_bool(active, True)
+    payload = {"result": "created"}
+    if existing:
+        existing.name = name.strip() if name else None
+        existing.description = description.strip() if description else None
+        existing.price_cents = price_cents
+        existing.active = active_value
+        session.add(existing)
+        payload = {"result": "updated", "id": existing.id}
+    else:
+        product = Product(
+            sku=sku_value,
+            name=name.strip() if name else None,
+            description=description.strip() if description else None,
+            price_cents=price_cents,
+            active=active_value,
+        )
+        session.add(product)
+        await session.flush()
+        payload = {"result": "created", "id": product.id}
+    await session.commit()
+    await _bump_products_version()
+    return await _product_action_response(request, session, filters, payload)
 
 
 @app.post("/product/{product_id}/update")
-def update_product(
+async def update_product(
     product_id: int,
     request: Request,
     sku: str = Form(...),
@@ -270,33 +398,36 @@ def update_product(
     filter_name: Optional[str] = Form(None),
     filter_description: Optional[str] = Form(None),
     filter_active: Optional[str] = Form(None),
+    session: AsyncSession = Depends(get_db),
 ):
     filters = _sanitize_filters(page, per_page, filter_sku, filter_name, filter_description, filter_active)
-    with SessionLocal() as session:
-        product = session.get(Product, product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        sku_value = sku.strip()
-        conflict = session.execute(
+    product = await session.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    sku_value = sku.strip()
+    conflict = (
+        await session.execute(
             select(Product).where(
                 func.lower(Product.sku) == sku_value.lower(),
                 Product.id != product_id,
             )
-        ).scalars().first()
-        if conflict:
-            raise HTTPException(status_code=400, detail="SKU already exists")
-        product.sku = sku_value
-        product.name = name.strip() if name else None
-        product.description = description.strip() if description else None
-        product.price_cents = _parse_price(price)
-        product.active = _parse_bool(active, product.active)
-        session.add(product)
-        session.commit()
-        return _product_action_response(request, session, filters, {"result": "updated", "id": product_id})
+        )
+    ).scalars().first()
+    if conflict:
+        raise HTTPException(status_code=400, detail="SKU already exists")
+    product.sku = sku_value
+    product.name = name.strip() if name else None
+    product.description = description.strip() if description else None
+    product.price_cents = _parse_price(price)
+    product.active = _parse_bool(active, product.active)
+    session.add(product)
+    await session.commit()
+    await _bump_products_version()
+    return await _product_action_response(request, session, filters, {"result": "updated", "id": product_id})
 
 
 @app.post("/product/{product_id}/delete")
-def delete_product(
+async def delete_product(
     product_id: int,
     request: Request,
     page: int = Form(1),
@@ -305,19 +436,20 @@ def delete_product(
     filter_name: Optional[str] = Form(None),
     filter_description: Optional[str] = Form(None),
     filter_active: Optional[str] = Form(None),
+    session: AsyncSession = Depends(get_db),
 ):
     filters = _sanitize_filters(page, per_page, filter_sku, filter_name, filter_description, filter_active)
-    with SessionLocal() as session:
-        product = session.get(Product, product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        session.delete(product)
-        session.commit()
-        return _product_action_response(request, session, filters, {"result": "deleted", "id": product_id})
+    product = await session.get(Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    await session.delete(product)
+    await session.commit()
+    await _bump_products_version()
+    return await _product_action_response(request, session, filters, {"result": "deleted", "id": product_id})
 
 
 @app.post("/products/delete-all")
-def delete_all_products(
+async def delete_all_products(
     request: Request,
     confirm: Optional[str] = Form(None),
     page: int = Form(1),
@@ -326,104 +458,136 @@ def delete_all_products(
     filter_name: Optional[str] = Form(None),
     filter_description: Optional[str] = Form(None),
     filter_active: Optional[str] = Form(None),
+    session: AsyncSession = Depends(get_db),
 ):
     if not _parse_bool(confirm, False):
         raise HTTPException(status_code=400, detail="Confirmation required")
     filters = _sanitize_filters(page, per_page, filter_sku, filter_name, filter_description, filter_active)
-    with SessionLocal() as session:
-        session.execute(Product.__table__.delete())
-        session.commit()
-        return _product_action_response(request, session, filters, {"deleted": True})
+    await session.execute(Product.__table__.delete())
+    await session.commit()
+    await _bump_products_version()
+    return await _product_action_response(request, session, filters, {"deleted": True})
 
 
 @app.get("/webhooks-fragment", response_class=HTMLResponse)
-def webhooks_fragment(request: Request):
-    with SessionLocal() as session:
-        return _render_webhooks_fragment(request, session)
+async def webhooks_fragment(request: Request, session: AsyncSession = Depends(get_db)):
+    return await _render_webhooks_fragment(request, session)
 
 
 @app.post("/webhooks/create")
-def create_webhook(
+async def create_webhook(
     request: Request,
     url: str = Form(...),
     event: str = Form(...),
     enabled: Optional[str] = Form("true"),
+    session: AsyncSession = Depends(get_db),
 ):
-    with SessionLocal() as session:
-        webhook = Webhook(
-            url=url.strip(),
-            event=event.strip(),
-            enabled=_parse_bool(enabled, True),
-        )
-        session.add(webhook)
-        session.commit()
-        if _is_htmx(request):
-            return _render_webhooks_fragment(request, session)
-        return JSONResponse({"id": webhook.id})
+    webhook = Webhook(
+        url=url.strip(),
+        event=event.strip(),
+        enabled=_parse_bool(enabled, True),
+    )
+    session.add(webhook)
+    await session.commit()
+    if _is_htmx(request):
+        return await _render_webhooks_fragment(request, session)
+    return JSONResponse({"id": webhook.id})
 
 
 @app.post("/webhooks/{webhook_id}/update")
-def update_webhook(
+async def update_webhook(
     webhook_id: int,
     request: Request,
     url: str = Form(...),
     event: str = Form(...),
     enabled: Optional[str] = Form("true"),
+    session: AsyncSession = Depends(get_db),
 ):
-    with SessionLocal() as session:
-        webhook = session.get(Webhook, webhook_id)
-        if not webhook:
-            raise HTTPException(status_code=404, detail="Webhook not found")
-        webhook.url = url.strip()
-        webhook.event = event.strip()
-        webhook.enabled = _parse_bool(enabled, webhook.enabled)
-        session.add(webhook)
-        session.commit()
-        if _is_htmx(request):
-            return _render_webhooks_fragment(request, session)
-        return JSONResponse({"id": webhook.id, "updated": True})
+    webhook = await session.get(Webhook, webhook_id)
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    webhook.url = url.strip()
+    webhook.event = event.strip()
+    webhook.enabled = _parse_bool(enabled, webhook.enabled)
+    session.add(webhook)
+    await session.commit()
+    if _is_htmx(request):
+        return await _render_webhooks_fragment(request, session)
+    return JSONResponse({"id": webhook.id, "updated": True})
 
 
 @app.post("/webhooks/{webhook_id}/delete")
-def delete_webhook(webhook_id: int, request: Request):
-    with SessionLocal() as session:
-        webhook = session.get(Webhook, webhook_id)
-        if not webhook:
-            raise HTTPException(status_code=404, detail="Webhook not found")
-        session.delete(webhook)
-        session.commit()
-        if _is_htmx(request):
-            return _render_webhooks_fragment(request, session)
-        return JSONResponse({"deleted": True})
+async def delete_webhook(webhook_id: int, request: Request, session: AsyncSession = Depends(get_db)):
+    webhook = await session.get(Webhook, webhook_id)
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    await session.delete(webhook)
+    await session.commit()
+    if _is_htmx(request):
+        return await _render_webhooks_fragment(request, session)
+    return JSONResponse({"deleted": True})
+
+
+_WEBHOOK_HEADERS = {"Content-Type": "application/json"}
+_WEBHOOK_PREVIEW_BYTES = 200
+
+
+@lru_cache(maxsize=256)
+def _webhook_test_body(event: str) -> bytes:
+    return orjson.dumps({"test": True, "event": event})
+
+
+async def _post_webhook(url: str, event: str) -> Dict:
+    payload = {}
+    # stream the response so only the first bytes of the body are read
+    async with http_client.stream(
+        "POST",
+        url,
+        content=_webhook_test_body(event),
+        headers=_WEBHOOK_HEADERS,
+    ) as resp:
+        payload["status_code"] = resp.status_code
+        body = bytearray()
+        async for chunk in resp.aiter_bytes():
+            body += chunk[: _WEBHOOK_PREVIEW_BYTES - len(body)]
+            if len(body) >= _WEBHOOK_PREVIEW_BYTES:
+                break
+        payload["text"] = body.decode("utf-8", errors="ignore")
+    return payload
 
 
 @app.post("/webhooks/test/{webhook_id}")
-def test_webhook(webhook_id: int, request: Request):
-    with SessionLocal() as session:
-        webhook = session.get(Webhook, webhook_id)
-        if not webhook:
-            raise HTTPException(status_code=404, detail="Webhook not found")
-        payload = {}
-        data = json.dumps({"test": True, "event": webhook.event}).encode("utf-8")
-        req = urllib_request.Request(
-            webhook.url,
-            data=data,
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
-        try:
-            with urllib_request.urlopen(req, timeout=5) as resp:
-                payload["status_code"] = resp.getcode()
-                payload["text"] = resp.read(200).decode("utf-8", errors="ignore")
-        except urllib_error.HTTPError as exc:
-            payload["status_code"] = exc.code
-            payload["text"] = exc.read(200).decode("utf-8", errors="ignore")
-        except Exception as exc:
-            message = str(exc)
-            if _is_htmx(request):
-                return HTMLResponse(f"<span class='error'>{message}</span>", status_code=500)
-            return JSONResponse({"error": message}, status_code=500)
+async def test_webhook(webhook_id: int, request: Request, session: AsyncSession = Depends(get_db)):
+    webhook = await session.get(Webhook, webhook_id)
+    if not webhook:
+        raise HTTPException(status_code=404, detail="Webhook not found")
+    # release the pooled connection before waiting on a possibly slow endpoint
+    await session.close()
+    try:
+        payload = await _post_webhook(webhook.url, webhook.event)
+    except Exception as exc:
+        message = str(exc)
+        if _is_htmx(request):
+            return HTMLResponse(f"<span class='error'>{message}</span>", status_code=500)
+        return JSONResponse({"error": message}, status_code=500)
 
     if _is_htmx(request):
         return HTMLResponse(f"<span class='success'>Response {payload.get('status_code', '?')}</span>")
     return JSONResponse(payload)
+
+
+@app.post("/webhooks/test-all")
+async def test_all_webhooks(session: AsyncSession = Depends(get_db)):
+    webhooks = (await session.execute(select(Webhook).where(Webhook.enabled.is_(True)))).scalars().all()
+    await session.close()
+    # fan out so the slowest endpoint, not the sum of all of them, bounds the request
+    results = await asyncio.gather(
+        *(_post_webhook(webhook.url, webhook.event) for webhook in webhooks),
+        return_exceptions=True,
+    )
+    return JSONResponse(
+        {
+            webhook.id: {"error": str(result)} if isinstance(result, Exception) else result
+            for webhook, result in zip(webhooks, results)
+        }
+    )
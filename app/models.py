@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Index, func
+from sqlalchemy import DDL, Column, Integer, String, Boolean, Index, event, func
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 from .database import Base
 from datetime import datetime
@@ -18,8 +18,29 @@ class Product(Base):
     __table_args__ = (
         # create case-insensitive unique constraint on lower(sku)
         Index("ix_products_lower_sku_unique", func.lower(sku), unique=True),
+        # trigram indexes so the ILIKE '%term%' filters can avoid sequential scans
+        Index("ix_products_sku_trgm", "sku", postgresql_using="gin", postgresql_ops={"sku": "gin_trgm_ops"}),
+        Index("ix_products_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index(
+            "ix_products_description_trgm",
+            "description",
+            postgresql_using="gin",
+            postgresql_ops={"description": "gin_trgm_ops"},
+        ),
+        # matches the listing's ORDER BY created_at DESC, id DESC so pages need no sort
+        Index("ix_products_created_at_id", created_at.desc(), id.desc()),
+        # same ordering for the "active only" listing; the predicate matches the filter's IS TRUE
+        Index(
+            "ix_products_active_created",
+            created_at.desc(),
+            id.desc(),
+            postgresql_where=active.is_(True),
+        ),
     )
 
+# gin_trgm_ops is provided by pg_trgm, which must exist before the indexes are created
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+
 class Webhook(Base):
     __tablename__ = "webhooks"
     id = Column(Integer, primary_key=True)
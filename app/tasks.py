@@ -1,12 +1,15 @@
 import csv
+import io
 import os
+import re
+from contextlib import nullcontext
 from decimal import Decimal
 from typing import Dict, Optional, List
 
 import redis
 
 from .celery_app import celery
-from .crud import upsert_products_bulk
+from .crud import bulk_load_indexes_dropped, copy_products_bulk, upsert_products_bulk
 
 redis_client = redis.Redis.from_url(
     os.getenv("REDIS_URL", "redis://localhost:6379/0"),
@@ -14,31 +17,49 @@ redis_client = redis.Redis.from_url(
 )
 
 
-def _task_key(task_id: str, suffix: str) -> str:
-    return f"task:{task_id}:{suffix}"
+TASK_STATE_TTL = int(os.getenv("TASK_STATE_TTL", "3600"))
+# bumped on every product write so cached product fragments are invalidated
+PRODUCTS_VERSION_KEY = "products:ver"
+
+
+def _task_key(task_id: str) -> str:
+    return f"task:{task_id}"
 
 
 def _set_task_state(task_id: str, **state) -> None:
-    for key, value in state.items():
-        redis_client.set(_task_key(task_id, key), value)
+    # all fields live in one hash so an update is a single HSET plus a refreshed TTL
+    key = _task_key(task_id)
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hset(key, mapping=state)
+    pipe.expire(key, TASK_STATE_TTL)
+    pipe.execute()
+
+
+def get_task_state(task_id: str, *fields: str) -> Dict[str, Optional[str]]:
+    # single HMGET so a status poll costs one Redis round-trip
+    values = redis_client.hmget(_task_key(task_id), fields)
+    return dict(zip(fields, values))
 
 
-def _count_rows(file_path: str) -> int:
-    with open(file_path, "r", encoding="utf-8") as fh:
-        total_lines = sum(1 for _ in fh)
-    return max(total_lines - 1, 0)
+_strip_price_chars = re.compile(r"[$,]").sub
+_FALSE_ACTIVE = frozenset({"false", "0", "no", "inactive"})
 
 
 def _parse_price_to_cents(value: Optional[str]) -> Optional[int]:
     if not value:
         return None
-    cleaned = (
-        value.replace("$", "")
-        .replace(",", "")
-        .strip()
-    )
+    # only outer whitespace is stripped; "1 000" stays invalid
+    cleaned = _strip_price_chars("", value).strip()
     if not cleaned:
         return None
+    whole, _, fraction = cleaned.partition(".")
+    if (
+        (whole or fraction)
+        and (not whole or whole.isdecimal())
+        and (not fraction or fraction.isdecimal())
+    ):
+        # plain "123" / "123.45": integer arithmetic, truncating past cents as Decimal did
+        return int(whole or 0) * 100 + int((fraction + "00")[:2])
     try:
         cents = int(Decimal(cleaned) * 100)
         return cents if cents >= 0 else None
@@ -46,15 +67,12 @@ def _parse_price_to_cents(value: Optional[str]) -> Optional[int]:
         return None
 
 
-def _normalize_row(row: Dict[str, str]) -> Optional[Dict]:
-    normalized = { (key or "").strip().lower(): value for key, value in row.items() }
+def _normalize_row(normalized: Dict[str, str]) -> Optional[Dict]:
+    # keys are already stripped and lower-cased via the reader's fieldnames
     sku = (normalized.get("sku") or "").strip()
     if not sku:
         return None
-    active_value = (normalized.get("active") or "").strip().lower()
-    active = True
-    if active_value in {"false", "0", "no", "inactive"}:
-        active = False
+    active = (normalized.get("active") or "").strip().lower() not in _FALSE_ACTIVE
     price_cents = (
         _parse_price_to_cents(normalized.get("price_cents"))
         or _parse_price_to_cents(normalized.get("price"))
@@ -68,59 +86,74 @@ def _normalize_row(row: Dict[str, str]) -> Optional[Dict]:
     }
 
 
-def _dedupe_batch(rows: List[Dict]) -> List[Dict]:
-    deduped = {}
-    for item in rows:
-        deduped[item["sku"].lower()] = item
-    return list(deduped.values())
+def _load_batch(rows: List[Dict], use_copy: bool) -> int:
+    if use_copy:
+        processed = copy_products_bulk(rows)
+    else:
+        processed = upsert_products_bulk(rows)
+    redis_client.incr(PRODUCTS_VERSION_KEY)
+    return processed
 
 
 @celery.task(bind=True, name="app.tasks.import_products_task")
 def import_products_task(self, file_path):
     task_id = self.request.id
-    _set_task_state(task_id, status="initializing", progress=0, total=0, invalid=0)
+    _set_task_state(
+        task_id, status="initializing", progress=0, total=0, invalid=0, bytes_read=0, total_bytes=0
+    )
 
     batch = []
     batch_size = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+    use_copy = os.getenv("IMPORT_USE_COPY", "true").lower() in {"true", "1", "yes"}
+    bulk_mode_bytes = int(os.getenv("IMPORT_BULK_MODE_BYTES", str(10 * 1024 * 1024)))
     processed = 0
     invalid_rows = 0
 
     try:
-        total_rows = _count_rows(file_path)
-        _set_task_state(task_id, status="parsing", total=total_rows)
+        # progress is tracked by bytes consumed so the file is only read once
+        total_bytes = os.path.getsize(file_path)
+        _set_task_state(task_id, status="parsing", total_bytes=total_bytes)
 
-        with open(file_path, "r", encoding="utf-8") as f:
+        # read through a binary handle: text-mode tell() is unavailable while iterating
+        with open(file_path, "rb") as raw, io.TextIOWrapper(raw, encoding="utf-8") as f:
             reader = csv.DictReader(f)
-            headers = {(h or "").strip().lower() for h in (reader.fieldnames or [])}
+            headers = [(h or "").strip().lower() for h in (reader.fieldnames or [])]
             if not headers or "sku" not in headers:
                 raise ValueError("CSV must include an 'sku' column")
-
-            for row in reader:
-                product = _normalize_row(row)
-                if not product:
-                    invalid_rows += 1
-                    continue
-
-                batch.append(product)
-                if len(batch) >= batch_size:
-                    processed += upsert_products_bulk(_dedupe_batch(batch))
-                    batch = []
-                    _set_task_state(
-                        task_id,
-                        status=f"importing ({processed}/{total_rows})",
-                        progress=processed,
-                        invalid=invalid_rows,
-                    )
-
-            if batch:
-                processed += upsert_products_bulk(_dedupe_batch(batch))
+            # normalise the header once instead of rebuilding every row's keys
+            reader.fieldnames = headers
+
+            # large files skip search-index maintenance per row and rebuild the indexes once at the end
+            index_guard = bulk_load_indexes_dropped() if total_bytes > bulk_mode_bytes else nullcontext()
+            with index_guard:
+                for row in reader:
+                    product = _normalize_row(row)
+                    if not product:
+                        invalid_rows += 1
+                        continue
+
+                    batch.append(product)
+                    if len(batch) >= batch_size:
+                        processed += _load_batch(batch, use_copy)
+                        batch = []
+                        _set_task_state(
+                            task_id,
+                            status=f"importing ({processed} rows)",
+                            progress=processed,
+                            invalid=invalid_rows,
+                            bytes_read=raw.tell(),
+                        )
+
+                if batch:
+                    processed += _load_batch(batch, use_copy)
 
         _set_task_state(
             task_id,
             status="complete",
             progress=processed,
-            total=total_rows,
+            total=processed,
             invalid=invalid_rows,
+            bytes_read=total_bytes,
         )
     except Exception as exc:
         _set_task_state(task_id, status=f"error: {exc}", error=str(exc))